@@ -3,11 +3,281 @@ Project Dashboard - Streamlit Application
 Upload and analyze Excel files with requirements data.
 """
 
+import hashlib
+import os
+import stat
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import pyarrow as pa
+import pyarrow.parquet as pq
 from utils import validate_excel_file, get_filter_options
 
+# Values (lower-cased, stripped) that count as False in boolean columns
+FALSY_VALUES = {'false', 'no', '0', '0.0', 'nee', '', 'nan', 'none'}
+
+# Version of the cleaned-frame format stored in the Parquet cache; bump whenever
+# _clean_dataframe or _coerce_bool (incl. FALSY_VALUES) changes so stale files are ignored
+CACHE_VERSION = b"2"
+
+# Limits for the on-disk Parquet cache; older or excess files are pruned
+PARQUET_CACHE_MAX_AGE = 7 * 24 * 60 * 60  # seconds
+PARQUET_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+# Maximum number of rows sent to the browser for the requirements table
+MAX_TABLE_ROWS = 5000
+
+
+def _coerce_bool(column):
+    """
+    Convert a mixed-type column to a numpy bool array.
+
+    The column is factorized first so the string normalization only runs over
+    its distinct values (typically a handful like True/False/'ja'/'nee'); the
+    per-row work is a single integer lookup.
+    """
+    codes, uniques = pd.factorize(column)
+    normalized = pd.Index(uniques).astype('string').str.strip().str.lower()
+
+    # Missing values get code -1, which picks the trailing False
+    lookup = np.append(~normalized.isin(FALSY_VALUES), False)
+    return lookup[codes]
+
+
+def _prune_parquet_cache(cache_dir):
+    """
+    Delete cache files older than PARQUET_CACHE_MAX_AGE, then the oldest
+    remaining ones until the directory is under PARQUET_CACHE_MAX_BYTES.
+
+    Only names written by _load_and_clean (*.parquet and *.<pid>.tmp) are touched.
+    """
+    now = time.time()
+    entries = []
+    for path in [*cache_dir.glob("*.parquet"), *cache_dir.glob("*.tmp")]:
+        try:
+            info = path.stat()
+            if now - info.st_mtime > PARQUET_CACHE_MAX_AGE:
+                path.unlink()
+            else:
+                entries.append((info.st_mtime, info.st_size, path))
+        except OSError:
+            continue
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= PARQUET_CACHE_MAX_BYTES:
+            break
+        try:
+            path.unlink()
+            total_size -= size
+        except OSError:
+            continue
+
+
+@st.cache_resource
+def _parquet_cache_dir():
+    """
+    Directory holding cleaned uploads as Parquet, shared by all sessions.
+
+    Always an app-owned subdirectory, so pruning and chmod never touch a
+    directory the user named: a per-user directory in the system temp dir by
+    default, or "dashboard_cache" inside $DASHBOARD_CACHE_DIR if set.
+    Returns None, disabling the disk cache, if the directory cannot be
+    created or is not private to the current user.
+    """
+    if os.environ.get("DASHBOARD_CACHE_DIR"):
+        cache_dir = Path(os.environ["DASHBOARD_CACHE_DIR"]) / "dashboard_cache"
+    else:
+        default_name = f"dashboard_cache_{os.getuid()}" if hasattr(os, 'getuid') else "dashboard_cache"
+        cache_dir = Path(tempfile.gettempdir()) / default_name
+
+    try:
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        info = cache_dir.lstat()
+
+        if hasattr(os, 'getuid'):
+            # Never serve frames from a directory (or symlink) another user controls
+            if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+                return None
+            if info.st_mode & 0o077:
+                os.chmod(cache_dir, 0o700)
+
+        _prune_parquet_cache(cache_dir)
+    except OSError:
+        return None
+
+    return cache_dir
+
+
+def _clean_dataframe(df):
+    """
+    Coerce the boolean columns and categorize low-cardinality text columns in place.
+    """
+    # Convert boolean columns to proper boolean type
+    for col in ('Reviewed', 'In scope'):
+        if col in df.columns:
+            df[col] = _coerce_bool(df[col])
+
+    # Store low-cardinality text columns as category so equality filters and
+    # value counts operate on integer codes instead of Python strings. Columns
+    # mixing text with numbers stay object: Arrow can't serialize such categories.
+    for col in ('Discipline', 'Fase'):
+        if col in df.columns and pd.api.types.infer_dtype(df[col], skipna=True) == 'string':
+            df[col] = df[col].astype('category')
+
+    # Store pure-text columns as Arrow-backed strings so duplicate detection,
+    # notna and Arrow serialization run in C instead of over Python objects.
+    # Columns mixing text with numbers stay object to keep their original values.
+    for col in df.select_dtypes('object').columns:
+        if pd.api.types.infer_dtype(df[col], skipna=True) == 'string':
+            df[col] = df[col].astype('string[pyarrow]')
+
+    # Downcast integer columns (e.g. numeric IDs) to the smallest type that fits,
+    # shrinking what is sent to the browser and stored in the Parquet cache
+    for col in df.select_dtypes('int64').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    return df
+
+
+@st.cache_data(show_spinner=False, max_entries=4, ttl="1h")
+def _load_and_clean(file_bytes, sheet_name=None):
+    """
+    Validate and clean an uploaded Excel file, cached on the raw file bytes.
+
+    Streamlit reruns the whole script on every widget interaction, so the
+    workbook parse, boolean coercion and duplicate detection only run once
+    per unique upload. The cleaned frame is also written to a Parquet file
+    named after the file hash, so a new session or server restart reading
+    the same upload skips the Excel parse entirely.
+    The in-memory cache is kept small since the Parquet file covers reloads.
+
+    Returns:
+        tuple: (is_valid, error_message, dataframe, duplicate_mask)
+    """
+    cache_dir = _parquet_cache_dir()
+    cache_path = None
+    if cache_dir is not None:
+        digest = hashlib.blake2b(file_bytes, digest_size=16)
+        digest.update(repr(sheet_name).encode())
+        digest.update(CACHE_VERSION)
+        cache_path = cache_dir / f"{digest.hexdigest()}.parquet"
+
+    df = None
+    if cache_path is not None and cache_path.exists():
+        # Map Arrow strings back to string[pyarrow]; pandas would otherwise
+        # rebuild them as Python-backed strings
+        string_dtype = pd.StringDtype('pyarrow')
+        try:
+            df = pq.read_table(cache_path).to_pandas(
+                types_mapper={pa.string(): string_dtype, pa.large_string(): string_dtype}.get
+            )
+            # Refresh the modification time so pruning treats it as recently used
+            os.utime(cache_path)
+        except (pa.ArrowException, OSError):
+            # Unreadable cache file - drop it and re-parse the upload below
+            cache_path.unlink(missing_ok=True)
+
+    if df is None:
+        is_valid, error_message, df = validate_excel_file(BytesIO(file_bytes), sheet_name)
+
+        if not is_valid:
+            return (is_valid, error_message, None, None)
+
+        df = _clean_dataframe(df)
+
+        if cache_path is not None:
+            # Write to a temporary name first so other sessions never read a partial file
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                df.to_parquet(tmp_path, compression='zstd')
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, cache_path)
+                _prune_parquet_cache(cache_dir)
+            except (pa.ArrowException, OSError):
+                # Columns mixing e.g. numbers and text can't be stored as Parquet;
+                # the in-memory cache still applies, so just skip the disk cache
+                tmp_path.unlink(missing_ok=True)
+
+    # Detect duplicates once; the mask is reused for the count and the filter
+    duplicate_mask = df.duplicated(subset=['RBS-ID (ON)'], keep='first').to_numpy()
+
+    return (True, None, df, duplicate_mask)
+
+
+def _value_counts(filtered_df, column_name):
+    """
+    Count values of a column for the chart sections, sorted by count.
+    """
+    counts = filtered_df[column_name].value_counts(dropna=True, sort=True)
+
+    # Categorical columns report every category, including ones filtered out
+    return counts[counts > 0]
+
+
+@st.cache_data(show_spinner=False, max_entries=64, ttl="1h")
+def _bar_chart(_filtered_df, file_id, filter_state, column_name, color_scale):
+    """
+    Build the Plotly bar chart of a column's value counts, cached per upload and filter state.
+
+    The filtered frame itself is not hashed (leading underscore); the upload's
+    file_id plus the sidebar filter selections identify it, so only a new
+    filter selection rebuilds the figure.
+    Bounded by entry count and age because the file_id key never recurs.
+    """
+    counts = _value_counts(_filtered_df, column_name)
+    fig = px.bar(x=counts.index, y=counts.values,
+                 labels={'x': column_name, 'y': 'Count', 'color': 'Count'},
+                 color=counts.values, color_continuous_scale=color_scale)
+    fig.update_layout(showlegend=False, height=400)
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=32, ttl="1h")
+def _table_data(_filtered_df, file_id, filter_state, columns):
+    """
+    Convert the displayed slice of the requirements table to Arrow, cached per upload and filter state.
+
+    Only the first MAX_TABLE_ROWS rows are converted; the full set is
+    available through the Excel export. Returns the pandas slice instead
+    when pyarrow cannot convert it.
+    Bounded by entry count and age because the file_id key never recurs.
+    """
+    table_slice = _filtered_df[list(columns)].head(MAX_TABLE_ROWS)
+
+    try:
+        return pa.Table.from_pandas(table_slice)
+    except pa.ArrowException:
+        # Columns mixing e.g. numbers and text can't be converted directly;
+        # st.dataframe applies its own fallback to the pandas slice
+        return table_slice
+
+
+@st.cache_data(show_spinner=False, max_entries=8, ttl="1h")
+def _to_xlsx(_filtered_df, file_id, filter_state):
+    """
+    Serialize the filtered frame to Excel bytes, cached per upload and filter state.
+
+    Entries are keyed on a file_id that never recurs once its session ends,
+    so the cache is bounded by entry count and age.
+
+    xlsxwriter writes plain cell records instead of building openpyxl cell
+    objects. Its constant_memory mode is not used: pandas writes cells column
+    by column, and constant_memory silently drops writes to earlier rows.
+    """
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        _filtered_df.to_excel(writer, index=False, sheet_name='Filtered_Data')
+
+    return output.getvalue()
+
+
 # Page configuration
 st.set_page_config(
     page_title="Project Dashboard",
@@ -29,23 +299,14 @@ uploaded_file = st.file_uploader(
 if uploaded_file is not None:
     # Validate and load data
     with st.spinner("Loading and validating file..."):
-        is_valid, error_message, df = validate_excel_file(uploaded_file)
+        is_valid, error_message, df, duplicate_mask = _load_and_clean(uploaded_file.getvalue(), None)
 
     if not is_valid:
         # Show error message
         st.error(error_message)
     else:
-        # File is valid - clean the data
-        # Convert boolean columns to proper boolean type
-        if 'Reviewed' in df.columns:
-            df['Reviewed'] = df['Reviewed'].map(lambda x: bool(x) if pd.notna(x) and x != '' and str(x).lower() not in ['false', 'no', '0', 'nee'] else False)
-
-        if 'In scope' in df.columns:
-            df['In scope'] = df['In scope'].map(lambda x: bool(x) if pd.notna(x) and x != '' and str(x).lower() not in ['false', 'no', '0', 'nee'] else False)
-
-        # Detect duplicates
-        duplicate_mask = df.duplicated(subset=['RBS-ID (ON)'], keep='first')
-        duplicate_count = duplicate_mask.sum()
+        # File is valid - data is already cleaned by the cached loader
+        duplicate_count = int(np.count_nonzero(duplicate_mask))
 
         if duplicate_count > 0:
             st.success(f"✅ File loaded successfully! {len(df)} requirements found.")
@@ -84,185 +345,206 @@ if uploaded_file is not None:
             help=f"Remove {duplicate_count} duplicate entries (keeps first occurrence)"
         )
 
-        # Apply filters
-        filtered_df = df.copy()
+        # Apply filters - combine all conditions into one boolean mask so the
+        # frame is sliced once instead of once per active filter
+        mask = np.ones(len(df), dtype=bool)
 
         # Remove duplicates if requested
         if hide_duplicates:
-            filtered_df = filtered_df[~filtered_df.duplicated(subset=['RBS-ID (ON)'], keep='first')]
+            mask &= ~duplicate_mask
 
         if selected_discipline != 'All':
-            filtered_df = filtered_df[filtered_df['Discipline'] == selected_discipline]
+            mask &= (df['Discipline'] == selected_discipline).to_numpy()
 
         if selected_fase != 'All':
-            filtered_df = filtered_df[filtered_df['Fase'] == selected_fase]
+            mask &= (df['Fase'] == selected_fase).to_numpy()
 
         if show_reviewed_only:
-            filtered_df = filtered_df[filtered_df['Reviewed'] == True]
+            mask &= df['Reviewed'].to_numpy()
 
         if show_in_scope_only:
-            filtered_df = filtered_df[filtered_df['In scope'] == True]
-
-        # KPI Section
-        st.header("📈 Key Metrics")
-
-        col1, col2, col3, col4 = st.columns(4)
-
-        with col1:
-            st.metric(
-                label="Total Requirements",
-                value=len(filtered_df)
-            )
-
-        with col2:
-            reviewed_count = filtered_df['Reviewed'].sum() if 'Reviewed' in filtered_df else 0
-            st.metric(
-                label="Reviewed",
-                value=int(reviewed_count)
-            )
-
-        with col3:
-            in_scope_count = filtered_df['In scope'].sum() if 'In scope' in filtered_df else 0
-            st.metric(
-                label="In Scope",
-                value=int(in_scope_count)
-            )
-
-        with col4:
-            if len(filtered_df) > 0:
-                review_percentage = (reviewed_count / len(filtered_df)) * 100
-            else:
-                review_percentage = 0
-            st.metric(
-                label="Review Progress",
-                value=f"{review_percentage:.1f}%"
-            )
+            mask &= df['In scope'].to_numpy()
 
-        # Data Completeness Section
-        st.header("📋 Data Completeness Analysis")
-        st.markdown("Track how well requirements data is being filled out in the system")
+        # Nothing downstream mutates filtered_df, so when no row is filtered out
+        # reuse df itself instead of materializing an identical copy
+        filtered_df = df if mask.all() else df.loc[mask]
 
-        comp_col1, comp_col2, comp_col3, comp_col4, comp_col5 = st.columns(5)
+        # Identifies the current filter selection for cached computations below
+        filter_state = (hide_duplicates, selected_discipline, selected_fase, show_reviewed_only, show_in_scope_only)
 
-        total_reqs = len(filtered_df)
+        total_reqs = int(np.count_nonzero(mask))
 
-        with comp_col1:
-            in_scope_complete = filtered_df['In scope'].sum() if 'In scope' in filtered_df.columns else 0
-            in_scope_pct = (in_scope_complete / total_reqs * 100) if total_reqs > 0 else 0
-            st.metric(
-                label="In Scope",
-                value=f"{int(in_scope_complete)}/{total_reqs}",
-                delta=f"{in_scope_pct:.1f}%"
-            )
-
-        with comp_col2:
-            has_discipline = filtered_df['Discipline'].notna().sum() if 'Discipline' in filtered_df.columns else 0
-            discipline_pct = (has_discipline / total_reqs * 100) if total_reqs > 0 else 0
-            st.metric(
-                label="Has Discipline",
-                value=f"{int(has_discipline)}/{total_reqs}",
-                delta=f"{discipline_pct:.1f}%"
-            )
-
-        with comp_col3:
-            has_fase = filtered_df['Fase'].notna().sum() if 'Fase' in filtered_df.columns else 0
-            fase_pct = (has_fase / total_reqs * 100) if total_reqs > 0 else 0
-            st.metric(
-                label="Has Fase",
-                value=f"{int(has_fase)}/{total_reqs}",
-                delta=f"{fase_pct:.1f}%"
-            )
-
-        with comp_col4:
-            has_object = filtered_df['Toegewezen aan object'].notna().sum() if 'Toegewezen aan object' in filtered_df.columns else 0
-            object_pct = (has_object / total_reqs * 100) if total_reqs > 0 else 0
-            st.metric(
-                label="Has Object Assignment",
-                value=f"{int(has_object)}/{total_reqs}",
-                delta=f"{object_pct:.1f}%"
-            )
-
-        with comp_col5:
-            has_definitie = filtered_df['Eis Definitie'].notna().sum() if 'Eis Definitie' in filtered_df.columns else 0
-            definitie_pct = (has_definitie / total_reqs * 100) if total_reqs > 0 else 0
-            st.metric(
-                label="Has Eis Definitie",
-                value=f"{int(has_definitie)}/{total_reqs}",
-                delta=f"{definitie_pct:.1f}%"
-            )
-
-        # Charts Section
-        st.header("📊 Visualizations")
-
-        chart_col1, chart_col2 = st.columns(2)
+        # Section selector - only the selected section is computed and rendered,
+        # so e.g. Plotly figures are not built while the user is looking at the table
+        section = st.radio(
+            "Section",
+            ["📈 Key Metrics", "📊 Visualizations", "📋 Requirements Data", "⬇️ Export Data"],
+            horizontal=True,
+            label_visibility="collapsed"
+        )
 
-        with chart_col1:
-            st.subheader("Requirements by Discipline")
-            if len(filtered_df) > 0:
-                discipline_counts = filtered_df['Discipline'].value_counts().reset_index()
-                discipline_counts.columns = ['Discipline', 'Count']
-                fig1 = px.bar(discipline_counts, x='Discipline', y='Count',
-                             color='Count', color_continuous_scale='Blues')
-                fig1.update_layout(showlegend=False, height=400)
-                st.plotly_chart(fig1, use_container_width=True)
+        if section == "📈 Key Metrics":
+            # Count KPI totals straight from the mask and the boolean arrays,
+            # so each column is traversed once and the results are shared below
+            reviewed_count = int(np.count_nonzero(df['Reviewed'].to_numpy() & mask)) if 'Reviewed' in df.columns else 0
+            in_scope_count = int(np.count_nonzero(df['In scope'].to_numpy() & mask)) if 'In scope' in df.columns else 0
+
+            # KPI Section
+            st.header("📈 Key Metrics")
+
+            col1, col2, col3, col4 = st.columns(4)
+
+            with col1:
+                st.metric(
+                    label="Total Requirements",
+                    value=total_reqs
+                )
+
+            with col2:
+                st.metric(
+                    label="Reviewed",
+                    value=reviewed_count
+                )
+
+            with col3:
+                st.metric(
+                    label="In Scope",
+                    value=in_scope_count
+                )
+
+            with col4:
+                if total_reqs > 0:
+                    review_percentage = (reviewed_count / total_reqs) * 100
+                else:
+                    review_percentage = 0
+                st.metric(
+                    label="Review Progress",
+                    value=f"{review_percentage:.1f}%"
+                )
+
+            # Data Completeness Section
+            st.header("📋 Data Completeness Analysis")
+            st.markdown("Track how well requirements data is being filled out in the system")
+
+            # Completeness counts for all text columns in a single notna pass
+            completeness_columns = [col for col in ('Discipline', 'Fase', 'Toegewezen aan object', 'Eis Definitie') if col in df.columns]
+            filled = np.count_nonzero(df[completeness_columns].notna().to_numpy() & mask[:, None], axis=0)
+            filled_counts = dict(zip(completeness_columns, filled.tolist()))
+            has_discipline = filled_counts.get('Discipline', 0)
+            has_fase = filled_counts.get('Fase', 0)
+            has_object = filled_counts.get('Toegewezen aan object', 0)
+            has_definitie = filled_counts.get('Eis Definitie', 0)
+
+            comp_col1, comp_col2, comp_col3, comp_col4, comp_col5 = st.columns(5)
+
+            with comp_col1:
+                in_scope_pct = (in_scope_count / total_reqs * 100) if total_reqs > 0 else 0
+                st.metric(
+                    label="In Scope",
+                    value=f"{in_scope_count}/{total_reqs}",
+                    delta=f"{in_scope_pct:.1f}%"
+                )
+
+            with comp_col2:
+                discipline_pct = (has_discipline / total_reqs * 100) if total_reqs > 0 else 0
+                st.metric(
+                    label="Has Discipline",
+                    value=f"{has_discipline}/{total_reqs}",
+                    delta=f"{discipline_pct:.1f}%"
+                )
+
+            with comp_col3:
+                fase_pct = (has_fase / total_reqs * 100) if total_reqs > 0 else 0
+                st.metric(
+                    label="Has Fase",
+                    value=f"{has_fase}/{total_reqs}",
+                    delta=f"{fase_pct:.1f}%"
+                )
+
+            with comp_col4:
+                object_pct = (has_object / total_reqs * 100) if total_reqs > 0 else 0
+                st.metric(
+                    label="Has Object Assignment",
+                    value=f"{has_object}/{total_reqs}",
+                    delta=f"{object_pct:.1f}%"
+                )
+
+            with comp_col5:
+                definitie_pct = (has_definitie / total_reqs * 100) if total_reqs > 0 else 0
+                st.metric(
+                    label="Has Eis Definitie",
+                    value=f"{has_definitie}/{total_reqs}",
+                    delta=f"{definitie_pct:.1f}%"
+                )
+
+        elif section == "📊 Visualizations":
+            # Charts Section
+            st.header("📊 Visualizations")
+
+            chart_col1, chart_col2 = st.columns(2)
+
+            with chart_col1:
+                st.subheader("Requirements by Discipline")
+                if len(filtered_df) > 0:
+                    fig1 = _bar_chart(filtered_df, uploaded_file.file_id, filter_state, 'Discipline', 'Blues')
+                    st.plotly_chart(fig1, use_container_width=True)
+                else:
+                    st.info("No data to display")
+
+            with chart_col2:
+                st.subheader("Requirements by Fase")
+                if len(filtered_df) > 0:
+                    fig2 = _bar_chart(filtered_df, uploaded_file.file_id, filter_state, 'Fase', 'Greens')
+                    st.plotly_chart(fig2, use_container_width=True)
+                else:
+                    st.info("No data to display")
+
+        elif section == "📋 Requirements Data":
+            # Data Table Section
+            st.header("📋 Requirements Data")
+
+            # Select columns to display
+            display_columns = [
+                'RBS-ID (ON)',
+                'Eis naam',
+                'Discipline',
+                'Fase',
+                'Reviewed',
+                'In scope'
+            ]
+
+            # Filter to only columns that exist in the dataframe
+            available_display_columns = [col for col in display_columns if col in filtered_df.columns]
+
+            if total_reqs > 0:
+                st.dataframe(
+                    _table_data(filtered_df, uploaded_file.file_id, filter_state, tuple(available_display_columns)),
+                    use_container_width=True,
+                    height=400
+                )
+                if total_reqs > MAX_TABLE_ROWS:
+                    st.caption(
+                        f"Showing the first {MAX_TABLE_ROWS} of {total_reqs} requirements. "
+                        "Use the Export Data section for the full set."
+                    )
             else:
-                st.info("No data to display")
-
-        with chart_col2:
-            st.subheader("Requirements by Fase")
-            if len(filtered_df) > 0:
-                fase_counts = filtered_df['Fase'].value_counts().reset_index()
-                fase_counts.columns = ['Fase', 'Count']
-                fig2 = px.bar(fase_counts, x='Fase', y='Count',
-                             color='Count', color_continuous_scale='Greens')
-                fig2.update_layout(showlegend=False, height=400)
-                st.plotly_chart(fig2, use_container_width=True)
-            else:
-                st.info("No data to display")
-
-        # Data Table Section
-        st.header("📋 Requirements Data")
-
-        # Select columns to display
-        display_columns = [
-            'RBS-ID (ON)',
-            'Eis naam',
-            'Discipline',
-            'Fase',
-            'Reviewed',
-            'In scope'
-        ]
-
-        # Filter to only columns that exist in the dataframe
-        available_display_columns = [col for col in display_columns if col in filtered_df.columns]
-
-        if len(filtered_df) > 0:
-            st.dataframe(
-                filtered_df[available_display_columns],
-                use_container_width=True,
-                height=400
-            )
-        else:
-            st.info("No requirements match the selected filters")
-
-        # Download Section
-        st.header("⬇️ Export Data")
-
-        # Convert dataframe to Excel
-        from io import BytesIO
-
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            filtered_df.to_excel(writer, index=False, sheet_name='Filtered_Data')
-
-        excel_data = output.getvalue()
-
-        st.download_button(
-            label="📥 Download Filtered Data as Excel",
-            data=excel_data,
-            file_name="filtered_requirements.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+                st.info("No requirements match the selected filters")
+
+        elif section == "⬇️ Export Data":
+            # Download Section
+            st.header("⬇️ Export Data")
+
+            # Only build the Excel file when the user asks for it, not on every rerun
+            if st.button("📄 Prepare Excel Export"):
+                with st.spinner("Preparing Excel file..."):
+                    excel_data = _to_xlsx(filtered_df, uploaded_file.file_id, filter_state)
+
+                st.download_button(
+                    label="📥 Download Filtered Data as Excel",
+                    data=excel_data,
+                    file_name="filtered_requirements.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
 
 else:
     # Show instructions when no file is uploaded
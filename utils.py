@@ -4,6 +4,30 @@ Utility functions for the Dashboard project.
 
 import pandas as pd
 
+# Required columns - these MUST be present (in display order)
+REQUIRED_COLUMNS = (
+    "RBS-ID (ON)",
+    "RBS-ID (OG)",
+    "Eis naam",
+    "Eistekst",
+    "Contractuele Toelichting",
+    "Brondocument/Referentie",
+    "Verwijzing naar brondocument en/of bijlage",
+    "Bijlage",
+    "In scope",
+    "Eis Definitie",
+    "Opmerking bij eisdefinitie",
+    "Discipline",
+    "Reviewed",
+    "Opmerking validatie OG",
+    "Fase",
+    "Object-ID",
+    "Toegewezen aan object"
+)
+
+# Same columns as a set for O(1) membership checks
+REQUIRED_COLUMN_SET = frozenset(REQUIRED_COLUMNS)
+
 
 def validate_excel_file(uploaded_file, sheet_name=None):
     """
@@ -26,30 +50,11 @@ def validate_excel_file(uploaded_file, sheet_name=None):
         valid, error, df = validate_excel_file(uploaded_file, sheet_name="Proceseisen")
     """
 
-    # Required columns - these MUST be present
-    REQUIRED_COLUMNS = [
-        "RBS-ID (ON)",
-        "RBS-ID (OG)",
-        "Eis naam",
-        "Eistekst",
-        "Contractuele Toelichting",
-        "Brondocument/Referentie",
-        "Verwijzing naar brondocument en/of bijlage",
-        "Bijlage",
-        "In scope",
-        "Eis Definitie",
-        "Opmerking bij eisdefinitie",
-        "Discipline",
-        "Reviewed",
-        "Opmerking validatie OG",
-        "Fase",
-        "Object-ID",
-        "Toegewezen aan object"
-    ]
-
     try:
         # Read the Excel file to get available sheets
-        excel_file = pd.ExcelFile(uploaded_file, engine='openpyxl')
+        # calamine (Rust-based) parses cell values without building openpyxl's
+        # per-cell style objects, which dominates load time on large sheets
+        excel_file = pd.ExcelFile(uploaded_file, engine='calamine')
 
         # Determine which sheet to use
         if sheet_name is None:
@@ -68,11 +73,10 @@ def validate_excel_file(uploaded_file, sheet_name=None):
             sheet_to_read = sheet_name
             info_message = f"ℹ️ Reading sheet: '{sheet_to_read}'"
 
-        # Read the sheet
+        # Read the sheet, reusing the already-opened workbook
         df = pd.read_excel(
-            uploaded_file,
-            sheet_name=sheet_to_read,
-            engine='openpyxl'
+            excel_file,
+            sheet_name=sheet_to_read
         )
 
         # Check if dataframe is empty
@@ -84,12 +88,12 @@ def validate_excel_file(uploaded_file, sheet_name=None):
             )
 
         # Check for required columns
-        missing_columns = []
-        for col in REQUIRED_COLUMNS:
-            if col not in df.columns:
-                missing_columns.append(col)
+        missing = REQUIRED_COLUMN_SET.difference(df.columns)
+
+        if missing:
+            # Report missing columns in the documented order
+            missing_columns = [col for col in REQUIRED_COLUMNS if col in missing]
 
-        if missing_columns:
             # Show all available columns (since there might be many)
             available_cols = ", ".join(df.columns.tolist())
             missing_cols_str = "\n  • ".join(missing_columns)
@@ -128,5 +132,15 @@ def get_filter_options(df, column_name):
     if column_name not in df.columns:
         return []
 
-    unique_values = df[column_name].dropna().unique().tolist()
-    return sorted(unique_values)
\ No newline at end of file
+    column = df[column_name]
+
+    # Categorical columns already hold their deduplicated, sorted values
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.categories.tolist()
+
+    unique_values = column.dropna().unique().tolist()
+    try:
+        return sorted(unique_values)
+    except TypeError:
+        # Mixed types (e.g. numbers and text) can't be compared directly
+        return sorted(unique_values, key=str)
\ No newline at end of file